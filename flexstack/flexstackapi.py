@@ -1,34 +1,103 @@
 import json
-import requests
-from typing import List
+from typing import TYPE_CHECKING, List, Optional, Tuple, Union
 from typing import Dict, Any
 from base64 import b64encode 
 
+from flexstack.models.base import BaseClient
 from flexstack.models.image import ImageGeneration
 from flexstack.models.audio import AudioGeneration
 from flexstack.models.llm import TextGeneration
 from flexstack.models.info import FlexstackInfo
 
+if TYPE_CHECKING:
+    import requests
+    from urllib3.util.retry import Retry
 
-class FlexStackAPI:
+
+# Endpoint paths relative to the base URL, keyed by method name
+_USER_PATHS = {
+    "login": "/user/login",
+    "refresh_token": "/user/refresh_token",
+    "get_user_profile": "/user/me",
+    "get_task_history": "/user/history",
+    "submit_feedback": "/ai/feedback"
+}
+
+
+class FlexStackAPI(BaseClient):
     """A Python wrapper for interacting with the FlexStack API.
 
+    This is the preferred entrypoint: it owns a single HTTP session that is
+    shared by every tool, so all calls reuse the same connection pool.
+
     Attributes:
         base_url (str): The base URL for the FlexStack API.
-        headers (dict): The headers to include credential. Will be updated after login.
+        headers (dict): The headers sent with every request, including the credential. Will be updated after login.
     """
+
+    _paths = _USER_PATHS
     
-    def __init__(self, api_endpoint: str = "https://api.flexstack.ai/v1") -> None:
+    def __init__(
+        self,
+        api_endpoint: str = "https://api.flexstack.ai/v1",
+        session: Optional["requests.Session"] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Tuple[float, float] = (5.0, 60.0),
+        retries: Union["Retry", int, None] = None,
+        backend: str = "requests",
+        gzip_threshold: Optional[int] = 2048
+    ) -> None:
         """Initialize the FlexStackAPI with an API key.
         
         Args:
             api_key: A valid API key as a string.
+            session: An existing session to use. A new one is created if omitted.
+            headers: Headers to send with every request, e.g. an existing `Authorization`.
+            timeout: The (connect, read) timeout in seconds for each request.
+            retries: Retry policy of a newly created session, as a `urllib3` `Retry` or a number of retries. Only a number of connect retries is supported with the `httpx` backend.
+            backend: The HTTP library to use, "requests" or "httpx" for HTTP/2 multiplexing.
+            gzip_threshold: Size in bytes above which large JSON bodies, such as chat histories, are gzipped. `None` disables compression, for servers that do not accept gzip request bodies.
         """
-        self.base_url = api_endpoint
-        self.image_tool = ImageGeneration(self.base_url)
-        self.audio_tool = AudioGeneration(self.base_url)
-        self.text_tool = TextGeneration(self.base_url)
-        self.info = FlexstackInfo(self.base_url)
+        super().__init__(api_endpoint, session=session, headers=headers, timeout=timeout, retries=retries, backend=backend, gzip_threshold=gzip_threshold)
+        # The tools share this client's session once it is created
+        self.image_tool = ImageGeneration(self.base_url, timeout=timeout, backend=backend, parent=self, gzip_threshold=gzip_threshold)
+        self.audio_tool = AudioGeneration(self.base_url, timeout=timeout, backend=backend, parent=self, gzip_threshold=gzip_threshold)
+        self.text_tool = TextGeneration(self.base_url, timeout=timeout, backend=backend, parent=self, gzip_threshold=gzip_threshold)
+        self.info = FlexstackInfo(self.base_url, timeout=timeout, backend=backend, parent=self, gzip_threshold=gzip_threshold)
+        self._tools = (self.image_tool, self.audio_tool, self.text_tool, self.info)
+
+    @BaseClient.base_url.setter
+    def base_url(self, base_url: str) -> None:
+        BaseClient.base_url.fset(self, base_url)
+        # The tools are created after the first assignment in `__init__`
+        for tool in getattr(self, "_tools", ()):
+            tool.base_url = base_url
+
+    def invalidate(self) -> None:
+        """Forget all cached task submissions."""
+        super().invalidate()
+        self.image_tool.invalidate()
+
+    def invalidate_metadata(self) -> None:
+        """Forget all cached metadata, such as model and LoRA listings."""
+        super().invalidate_metadata()
+        self.image_tool.invalidate_metadata()
+        self.info.invalidate_metadata()
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return self._session.headers
+
+    @headers.setter
+    def headers(self, headers: Dict[str, str]) -> None:
+        # Replace the headers set through this client, keeping the session's defaults,
+        # so assigning headers without `Authorization` drops the old credentials
+        if self._http_session is not None:
+            session_headers = self._http_session.headers
+            for name in (set(self._headers) | {"Authorization"}) - set(headers):
+                session_headers.pop(name, None)
+            session_headers.update(headers)
+        self._headers = dict(headers)
 
     def login(self, username: str, password: str) -> Dict[str, Any]:
         """Obtain Token via Basic Auth.
@@ -39,7 +108,7 @@ class FlexStackAPI:
         Returns:
             A dictionary with the new token information.
         """
-        url = f"{self.base_url}/user/login"
+        url = self._urls.login
         # Authorization token: we need to base 64 encode it 
         # and then decode it to acsii as python 3 stores it as a byte string
         def basic_auth(username, password):
@@ -48,13 +117,14 @@ class FlexStackAPI:
 
         #then connect
         headers = { 'Authorization' : basic_auth(username, password) }        
-        response = requests.post(url, headers= headers)
+        response = self._post(url, headers= headers)
 
         # obtain the token
-        token = response.json()["data"]["access_token"]
+        result = self._json(response)
+        token = result["data"]["access_token"]
         self.headers = {'Authorization' :  'Bearer ' + token}
         
-        return response.json()
+        return result
 
     def refresh_token(self, refresh_token: str) -> Dict[str, Any]:
         """Refresh the API token using a refresh token.
@@ -65,10 +135,10 @@ class FlexStackAPI:
         Returns:
             A dictionary with the new token information.
         """
-        url = f"{self.base_url}/user/refresh_token"
+        url = self._urls.refresh_token
         form = {"refresh_token": refresh_token}
-        response = requests.post(url, data=form, headers=self.headers)
-        return response.json()        
+        response = self._post(url, data=form)
+        return self._json(response)        
 
     def get_user_profile(self) -> Dict[str, Any]:
         """Retrieve the user's profile information.
@@ -76,9 +146,9 @@ class FlexStackAPI:
         Returns:
             A dictionary containing the user's profile information.
         """
-        url = f"{self.base_url}/user/me"
-        response = requests.post(url, headers=self.headers)
-        return response.json()
+        url = self._urls.get_user_profile
+        response = self._post(url)
+        return self._json(response)
 
     def get_task_history(self) -> Dict[str, Any]:
         """Retrieve the user's task history.
@@ -86,13 +156,13 @@ class FlexStackAPI:
         Returns:
             A dictionary containing the user's task history.
         """
-        url = f"{self.base_url}/user/history"
-        response = requests.get(url, headers=self.headers)
-        return response.json()
+        url = self._urls.get_task_history
+        response = self._get(url)
+        return self._json(response)
 
     def get_all_models(self):
         """Get all models"""
-        return self.info.get_all_models(headers=self.headers)
+        return self.info.get_all_models()
 
     def get_models(self, task: str):
         """Get models of a task
@@ -100,7 +170,7 @@ class FlexStackAPI:
         Args:
             task (str): Task name
         """
-        return self.info.get_models(task=task, headers=self.headers)
+        return self.info.get_models(task=task)
     
 
     # IMAGE BLOCK ===============================
@@ -121,8 +191,7 @@ class FlexStackAPI:
             rotation=rotation, 
             steps=steps, 
             negative_prompt=negative_prompt, 
-            enhance_prompt=enhance_prompt, 
-            headers=self.headers
+            enhance_prompt=enhance_prompt
         )
 
     def create_sd_task(self, prompt: str, rotation: str = "square", steps: int = 50, negative_prompt: str = "", enhance_prompt: bool = False) -> Dict[str, Any]:
@@ -142,8 +211,7 @@ class FlexStackAPI:
             rotation=rotation, 
             steps=steps, 
             negative_prompt=negative_prompt, 
-            enhance_prompt=enhance_prompt, 
-            headers=self.headers
+            enhance_prompt=enhance_prompt
         )
     
     def get_result_sd_task(self, task_id: str) -> Dict[str, Any]:
@@ -156,8 +224,7 @@ class FlexStackAPI:
             A dictionary containing the result of the task.
         """
         return self.image_tool.get_result_sd_task(
-            task_id=task_id, 
-            headers=self.headers
+            task_id=task_id
         )
     
     def get_result_sdxl_task(self, task_id: str) -> Dict[str, Any]:
@@ -170,8 +237,7 @@ class FlexStackAPI:
             A dictionary containing the result of the task.
         """
         return self.image_tool.get_result_sdxl_task(
-            task_id=task_id, 
-            headers=self.headers
+            task_id=task_id
         )
     
     def create_lora_trainer_task(self, prompt: str, images: List[str]) -> Dict[str, Any]:
@@ -179,15 +245,14 @@ class FlexStackAPI:
 
         Args:
             prompt: The text prompt for fine-tuning.
-            images: A list of URLs pointing to images for fine-tuning.
+            images: A list of URLs or local file paths of images for fine-tuning.
 
         Returns:
             A dictionary containing the task ID and other response data.
         """
         return self.image_tool.create_lora_trainer_task(
             prompt=prompt, 
-            images=images, 
-            headers=self.headers
+            images=images
         )
     
     def get_result_lora_trainer_task(self, task_id: str) -> Dict[str, Any]:
@@ -200,8 +265,7 @@ class FlexStackAPI:
             A dictionary containing the result of the task.
         """
         return self.image_tool.get_result_lora_trainer_task(
-            task_id=task_id, 
-            headers=self.headers
+            task_id=task_id
         )
 
     def get_lora_types(self):
@@ -210,7 +274,7 @@ class FlexStackAPI:
         Returns:
             A dictionary containing the LORA types
         """
-        return self.info.get_lora_types(headers=self.headers)
+        return self.image_tool.get_lora_types()
     
     def get_lora_cates(self):
         """Get LORA categories
@@ -218,7 +282,7 @@ class FlexStackAPI:
         Returns:
             A dictionary containing the LORA categories
         """  
-        return self.info.get_lora_cates(headers=self.headers)  
+        return self.image_tool.get_lora_cates()  
 
     def get_lora_models(self, type: str = None, cate: str = None):
         """Get LORA models
@@ -231,7 +295,7 @@ class FlexStackAPI:
             A dictionary containing the LORA models
         
         """
-        return self.info.get_lora_models(type=type, cate=cate, headers=self.headers)
+        return self.image_tool.get_lora_models(type=type, cate=cate)
 
     def create_txt2img(
         self,
@@ -244,6 +308,7 @@ class FlexStackAPI:
         seed: int = -1,
         negative_prompt: str = "",
         enhance_prompt: bool = False,
+        cache: bool = True,
     ) -> Dict[str, Any]:
         """Create an text to image generation task with a prompt and configuration.
 
@@ -257,6 +322,7 @@ class FlexStackAPI:
             seed (int): Random seed for image generation
             negative_prompt (str): Prompt for generating negative examples.
             enhance_prompt (bool): Whether to enhance the prompt or not. Default is False.
+            cache (bool): Reuse the previous task for an identical request with a fixed seed and credentials, unless it was seen failing. Default is True.
 
         Returns:
             A dictionary with the task creation response.
@@ -271,7 +337,7 @@ class FlexStackAPI:
             seed=seed, 
             negative_prompt=negative_prompt, 
             enhance_prompt=enhance_prompt, 
-            headers=self.headers
+            cache=cache
         )
     
     def result_txt2img(self, task_id: str):
@@ -284,8 +350,7 @@ class FlexStackAPI:
             A dictionary with detail response.
         """
         return self.image_tool.result_txt2img(
-            task_id=task_id, 
-            headers=self.headers
+            task_id=task_id
         )
 
     def create_txt2vid(
@@ -300,6 +365,7 @@ class FlexStackAPI:
         seed: int = -1,
         negative_prompt: str = "",
         enhance_prompt: bool = False,
+        cache: bool = True,
     ) -> Dict[str, Any]:
         """Create an text to video generation task with a prompt and configuration.
 
@@ -314,6 +380,7 @@ class FlexStackAPI:
             seed (int): Random seed for video generation
             negative_prompt (str): Prompt for generating negative examples.
             enhance_prompt (bool): Whether to enhance the prompt or not. Default is False.
+            cache (bool): Reuse the previous task for an identical request with a fixed seed and credentials, unless it was seen failing. Default is True.
 
         Returns:
             A dictionary with the task creation response.
@@ -329,7 +396,7 @@ class FlexStackAPI:
             seed=seed, 
             negative_prompt=negative_prompt, 
             enhance_prompt=enhance_prompt, 
-            headers=self.headers
+            cache=cache
         )
 
     def result_txt2vid(self, task_id: str):
@@ -342,8 +409,7 @@ class FlexStackAPI:
             A dictionary with detail response.
         """
         return self.image_tool.result_txt2vid(
-            task_id=task_id, 
-            headers=self.headers
+            task_id=task_id
         )
     
     # TEXT BLOCK ===============================
@@ -376,8 +442,7 @@ class FlexStackAPI:
             temperature=temperature, 
             top_k=top_k, 
             top_p=top_p, 
-            max_tokens=max_tokens, 
-            headers=self.headers
+            max_tokens=max_tokens
         )
 
     def generate_text_stream(
@@ -387,7 +452,8 @@ class FlexStackAPI:
         temperature: float = 0.7,
         top_k: int = 50,
         top_p: float = 0.95,
-        max_tokens: int = 256
+        max_tokens: int = 256,
+        decode: bool = False
     ):
         
         """Generate text with messages input in streaming.
@@ -399,19 +465,20 @@ class FlexStackAPI:
             top_k (int): Top-k for generation. Default is 50.
             top_p (float): Top-p for generation. Default is 0.95.
             max_tokens (int): Max tokens for generation. Default is 256.
+            decode (bool): Whether to decode the lines to str. Default is False.
         
         Returns:
-            A dictionary with the generated text.
+            An iterator over the non-empty lines of the streamed response, as bytes unless `decode` is True.
         """
 
-        self.text_tool.generate_text_stream(
+        return self.text_tool.generate_text_stream(
             messages=messages, 
             model=model, 
             temperature=temperature, 
             top_k=top_k, 
             top_p=top_p, 
             max_tokens=max_tokens, 
-            headers=self.headers
+            decode=decode
         )
 
     def create_text_embedding(self, text: str, model: str="mistral"):
@@ -426,8 +493,7 @@ class FlexStackAPI:
         """
         return self.text_tool.create_text_embedding(
             text=text, 
-            model=model, 
-            headers=self.headers
+            model=model
         )
 
     def result_text_embedding(self, task_id: str):
@@ -440,8 +506,7 @@ class FlexStackAPI:
             A dictionary with detail response.
         """
         return self.text_tool.result_text_embedding(
-            task_id=task_id, 
-            headers=self.headers
+            task_id=task_id
         )
     
     # AUDIO BLOCK ===============================
@@ -464,7 +529,6 @@ class FlexStackAPI:
         return self.audio_tool.create_txt2audio(
             prompt=prompt, 
             model=model, 
-            headers=self.headers,
             **kwargs
         )
     
@@ -478,8 +542,7 @@ class FlexStackAPI:
             A dictionary with detail response.
         """
         return self.audio_tool.result_txt2audio(
-            task_id=task_id, 
-            headers=self.headers
+            task_id=task_id
         )
     
     # FEEDBACK BLOCK ===============================
@@ -494,7 +557,7 @@ class FlexStackAPI:
         Returns:
             A dictionary indicating the status of the feedback submission.
         """
-        url = f"{self.base_url}/ai/feedback"
+        url = self._urls.submit_feedback
         payload = {"task_id": task_id, "rating": rating, "feedback": feedback}
-        response = requests.post(url, json=payload, headers=self.headers)
-        return response.json()
+        response = self._post_json(url, payload)
+        return self._json(response)
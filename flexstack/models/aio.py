@@ -0,0 +1,522 @@
+"""Asynchronous clients built on `aiohttp`.
+
+These mirror `TextGeneration`, `ImageGeneration` and `AudioGeneration` with
+coroutine methods, so many tasks can be submitted or polled concurrently::
+
+    async with AsyncImageGeneration(base_url) as client:
+        tasks = await asyncio.gather(*(client.create_txt2img(p, headers=headers) for p in prompts))
+        results = await asyncio.gather(*(client.result_txt2img(t["data"]["task_id"], headers=headers) for t in tasks))
+
+`aiohttp` is an optional dependency and is only required by this module, see
+the `async` extra (`pip install flexstack[async]`).
+"""
+import asyncio
+import os
+import time
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+import aiohttp
+
+from flexstack.models.audio import _AUDIO_PATHS, _validate_kwargs
+from flexstack.models.base import encode_json_body, is_finished, json_loads
+from flexstack.models.image import _IMAGE_PATHS, ImageGeneration
+from flexstack.models.llm import _TEXT_PATHS, _validate_messages
+
+
+class AsyncBaseClient:
+    """Base class for the asynchronous clients, holding a pooled `aiohttp` session.
+
+    Attributes:
+        base_url (str): The base URL for the FlexStack API.
+    """
+
+    # Endpoint paths relative to `base_url`, keyed by method name
+    _paths: Dict[str, str] = {}
+
+    def __init__(
+        self,
+        base_url: str,
+        session: Optional[aiohttp.ClientSession] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Tuple[float, float] = (5.0, 60.0),
+        gzip_threshold: Optional[int] = 2048
+    ) -> None:
+        """Initialize the client.
+
+        Args:
+            base_url: The base URL for the FlexStack API.
+            session: An existing session to share with other clients. A new one is created on first use if omitted.
+            headers: Headers to send with every request, set once on the session.
+            timeout: The (connect, read) timeout in seconds for each request.
+            gzip_threshold: Size in bytes above which large JSON bodies, such as chat histories, are gzipped. `None` disables compression, for servers that do not accept gzip request bodies.
+        """
+        self.base_url = base_url
+        self.gzip_threshold = gzip_threshold
+        self._timeout = aiohttp.ClientTimeout(total=None, sock_connect=timeout[0], sock_read=timeout[1])
+        # Only bound the connect for long-lived streams
+        self._stream_timeout = aiohttp.ClientTimeout(total=None, sock_connect=timeout[0], sock_read=None)
+        self._owns_session = session is None
+        self._session = session
+        self._headers = headers
+        if session is not None and headers:
+            session.headers.update(headers)
+
+    @property
+    def base_url(self) -> str:
+        return self._base_url
+
+    @base_url.setter
+    def base_url(self, base_url: str) -> None:
+        self._base_url = base_url
+        self._urls = SimpleNamespace(**{name: base_url + path for name, path in self._paths.items()})
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # The session must be created inside a running event loop
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=32, ttl_dns_cache=300),
+                headers=self._headers
+            )
+        return self._session
+
+    def _post_json(self, url: str, payload: Any, headers: Optional[Dict[str, str]] = None, compress: bool = False, timeout: Optional[aiohttp.ClientTimeout] = None) -> Any:
+        body, headers = encode_json_body(payload, headers, self.gzip_threshold if compress else None)
+        return self._get_session().post(url, data=body, headers=headers, timeout=timeout or self._timeout)
+
+    async def _post(self, url: str, headers: Optional[Dict[str, str]], payload: Any = None, data: Any = None, compress: bool = False) -> Dict[str, Any]:
+        if payload is not None:
+            request = self._post_json(url, payload, headers, compress=compress)
+        else:
+            request = self._get_session().post(url, data=data, headers=headers, timeout=self._timeout)
+        async with request as response:
+            return json_loads(await response.read())
+
+    async def _get(self, url: str, headers: Optional[Dict[str, str]], **kwargs) -> Dict[str, Any]:
+        async with self._get_session().get(url, headers=headers, timeout=self._timeout, **kwargs) as response:
+            return json_loads(await response.read())
+
+    async def wait_for_result(
+        self,
+        task_id: str,
+        poll_fn: Callable[[str], Awaitable[Dict[str, Any]]],
+        *,
+        initial: float = 0.5,
+        factor: float = 1.5,
+        max_interval: float = 10.0,
+        timeout: float = 600.0
+    ) -> Dict[str, Any]:
+        """Poll a task until it finishes, backing off exponentially between polls.
+
+        Args:
+            task_id: The unique identifier of the task.
+            poll_fn: The result coroutine method to poll, called with the task ID (e.g. `self.result_txt2img`).
+            initial: Delay in seconds before the second poll.
+            factor: Multiplier applied to the delay after each poll.
+            max_interval: Upper bound in seconds for the delay between polls.
+            timeout: Maximum time in seconds to wait for the task.
+
+        Returns:
+            The last result returned by `poll_fn`.
+
+        Raises:
+            TimeoutError: If the task is not finished within `timeout` seconds.
+        """
+        deadline = time.monotonic() + timeout
+        delay = initial
+        while True:
+            result = await poll_fn(task_id)
+            if is_finished(result):
+                return result
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"Task `{task_id}` did not finish within {timeout} seconds")
+            await asyncio.sleep(min(delay, max_interval, remaining))
+            delay *= factor
+
+    async def close(self) -> None:
+        """Close the underlying HTTP session if this client created it."""
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.close()
+
+
+class AsyncTextGeneration(AsyncBaseClient):
+    _paths = _TEXT_PATHS
+
+    async def text_generation(
+        self,
+        messages: list,
+        model: str = "gemma-7b",
+        temperature: float = 0.7,
+        top_k: int = 50,
+        top_p: float = 0.95,
+        max_tokens: int = 256,
+        headers: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Any]:
+        """Generate text with messages input.
+
+        Args:
+            messages (list): The list of messages prompt for generation.
+            model (str): The type of model to be used. Default is "gemma-7b".
+            temperature (float): Temperature for generation. Default is 0.7.
+            top_k (int): Top-k for generation. Default is 50.
+            top_p (float): Top-p for generation. Default is 0.95.
+            max_tokens (int): Max tokens for generation. Default is 256.
+
+        Returns:
+            A dictionary with the generated text.
+        """
+        _validate_messages(messages)
+
+        url = self._urls.text_generation
+        configs = {
+            "model": model, "temperature": temperature, "top_k": top_k, "top_p": top_p, "max_new_tokens": max_tokens
+        }
+        payload = {"messages": messages, "configs": configs}
+        return await self._post(url, headers, payload, compress=True)
+
+    async def generate_text_stream(
+        self,
+        messages: list,
+        model: str = "gemma-7b",
+        temperature: float = 0.7,
+        top_k: int = 50,
+        top_p: float = 0.95,
+        max_tokens: int = 256,
+        headers: Optional[Dict[str, str]] = None,
+        decode: bool = False
+    ) -> AsyncIterator[Union[bytes, str]]:
+        """Generate text with messages input in streaming.
+
+        Args:
+            messages (list): The list of messages prompt for generation.
+            model (str): The type of model to be used. Default is "gemma-7b".
+            temperature (float): Temperature for generation. Default is 0.7.
+            top_k (int): Top-k for generation. Default is 50.
+            top_p (float): Top-p for generation. Default is 0.95.
+            max_tokens (int): Max tokens for generation. Default is 256.
+            decode (bool): Whether to decode the lines to str. Default is False.
+
+        Yields:
+            Non-empty lines of the streamed response, as bytes unless `decode` is True.
+        """
+        _validate_messages(messages)
+
+        url = self._urls.generate_text_stream
+        configs = {
+            "model": model, "temperature": temperature, "top_k": top_k, "top_p": top_p, "max_new_tokens": max_tokens
+        }
+        payload = {"messages": messages, "configs": configs}
+        async with self._post_json(url, payload, headers, compress=True, timeout=self._stream_timeout) as response:
+            response.raise_for_status()
+            async for line in response.content:
+                line = line.rstrip(b"\r\n")
+                if line:
+                    yield line.decode("utf-8") if decode else line
+
+    async def create_text_embedding(self, text: str, model: str = "mistral", headers: Optional[Dict[str, str]] = None):
+        """Create text embedding
+
+        Args:
+            text (str): The text for embedding.
+            model (str): The type of model to be used. Default is "mistral".
+
+        Returns:
+            A dictionary with the generated embedding.
+        """
+        url = self._urls.create_text_embedding
+        payload = {"text": text, "configs": {"model": model}}
+        return await self._post(url, headers, payload)
+
+    async def result_text_embedding(self, task_id: str, headers: Optional[Dict[str, str]] = None):
+        """Get result of text embedding with task_id
+
+        Args:
+            task_id (str): Unique task ID of the text embedding task.
+
+        Returns:
+            A dictionary with detail response.
+        """
+        url = self._urls.result_text_embedding.format(task_id)
+        return await self._get(url, headers)
+
+
+class AsyncImageGeneration(AsyncBaseClient):
+    _paths = _IMAGE_PATHS
+
+    # IMAGE ============
+    async def create_sd_task(self, prompt: str, rotation: str = "square", steps: int = 50, negative_prompt: str = "", enhance_prompt: bool = False, headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """Create an SD1.5 image task with a prompt and configuration.
+
+        Args:
+            prompt: Description of the image to be generated.
+            rotation: Image rotation preference.
+            steps: Number of generation steps.
+            negative_prompt: Negative aspects to avoid in the image.
+
+        Returns:
+            A dictionary with the task creation response.
+        """
+        config = ImageGeneration.create_config(rotation, steps, negative_prompt, enhance_prompt)
+        url = self._urls.create_sd_task
+        payload = {"prompt": prompt, "config": config}
+        return await self._post(url, headers, payload)
+
+    async def get_result_sd_task(self, task_id: str, headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """Retrieve the result of a previously submitted SD task.
+
+        Args:
+            task_id: The unique identifier of the SD task.
+
+        Returns:
+            A dictionary containing the result of the task.
+        """
+        url = self._urls.get_result_sd_task
+        return await self._post(url, headers, {"task_id": task_id})
+
+    async def create_sdxl_task(self, prompt: str, rotation: str = "square", steps: int = 50, negative_prompt: str = "", enhance_prompt: bool = False, headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """Create an SDXL-turbo image task with a prompt and configuration.
+
+        Args:
+            prompt: Description of the image to be generated.
+            rotation: Image rotation preference.
+            steps: Number of generation steps.
+            negative_prompt: Negative aspects to avoid in the image.
+
+        Returns:
+            A dictionary with the task creation response.
+        """
+        config = ImageGeneration.create_config(rotation, steps, negative_prompt, enhance_prompt)
+        url = self._urls.create_sdxl_task
+        payload = {"prompt": prompt, "config": config}
+        return await self._post(url, headers, payload)
+
+    async def get_result_sdxl_task(self, task_id: str, headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """Retrieve the result of a previously submitted SDXL Turbo task.
+
+        Args:
+            task_id: The unique identifier of the SDXL Turbo task.
+
+        Returns:
+            A dictionary containing the result of the task.
+        """
+        url = self._urls.get_result_sdxl_task
+        return await self._post(url, headers, {"task_id": task_id})
+
+    async def create_txt2img(
+        self,
+        prompt: str,
+        model: str = "sdxl-lightning",
+        lora: str = "",
+        width: int = 1024,
+        height: int = 1024,
+        steps: int = 8,
+        seed: int = -1,
+        negative_prompt: str = "",
+        enhance_prompt: bool = False,
+        headers: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Any]:
+        """Create an text to image generation task with a prompt and configuration.
+
+        Args:
+            prompt (str): Description of the image to be generated.
+            model (str): The type of model to be used. Default is "sdxl-lightning".
+            lora (str): Optional parameter for LORA model.
+            width (int): Width of the image. Default is 1024.
+            height (int): Height of the image. Default is 1024.
+            steps (int): Number of steps for image generation. Default is 8.
+            seed (int): Random seed for image generation
+            negative_prompt (str): Prompt for generating negative examples.
+            enhance_prompt (bool): Whether to enhance the prompt or not. Default is False.
+
+        Returns:
+            A dictionary with the task creation response.
+        """
+        configs = {
+            "model": model, "lora": lora, "height": height, "width": width, "steps": steps, "negative_prompt": negative_prompt, "seed": seed, "enhance_prompt": enhance_prompt
+        }
+        url = self._urls.create_txt2img
+        payload = {"prompt": prompt, "configs": configs}
+        return await self._post(url, headers, payload)
+
+    async def result_txt2img(self, task_id: str, headers: Optional[Dict[str, str]] = None):
+        """Get result of text to image generation with task_id
+
+        Args:
+            task_id (str): The unique identifier of the text-to-image generation task.
+
+        Returns:
+            A dictionary with detail response.
+        """
+        url = self._urls.result_txt2img.format(task_id)
+        return await self._get(url, headers)
+
+    # VIDEO ============
+    async def create_txt2vid(
+        self,
+        prompt: str,
+        model: str = "damo-text-to-video",
+        width: int = 256,
+        height: int = 256,
+        fps: int = 8,
+        num_frames: int = 16,
+        steps: int = 25,
+        seed: int = -1,
+        negative_prompt: str = "",
+        enhance_prompt: bool = False,
+        headers: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Any]:
+        """Create an text to video generation task with a prompt and configuration.
+
+        Args:
+            prompt (str): Description of the video to be generated.
+            model (str): The type of model to be used. Default is "damo-text-to-video".
+            width (int): Width of the video. Default is 256.
+            height (int): Height of the video. Default is 256.
+            fps (int): Number of frames per second.
+            num_frames (int): Number of frames in the video.
+            steps (int): Number of steps for video generation. Default is 25.
+            seed (int): Random seed for video generation
+            negative_prompt (str): Prompt for generating negative examples.
+            enhance_prompt (bool): Whether to enhance the prompt or not. Default is False.
+
+        Returns:
+            A dictionary with the task creation response.
+        """
+        configs = {
+            "model": model, "width": width, "height": height, "fps": fps, "num_frames": num_frames, "steps": steps, "negative_prompt": negative_prompt, "seed": seed, "enhance_prompt": enhance_prompt
+        }
+        url = self._urls.create_txt2vid
+        payload = {"prompt": prompt, "configs": configs}
+        return await self._post(url, headers, payload)
+
+    async def result_txt2vid(self, task_id: str, headers: Optional[Dict[str, str]] = None):
+        """Get result of text to video generation with task_id
+
+        Args:
+            task_id (str): Unique task ID of the text-to-video generation task.
+
+        Returns:
+            A dictionary with detail response.
+        """
+        url = self._urls.result_txt2vid.format(task_id)
+        return await self._get(url, headers)
+
+    # LORA ============
+    async def get_lora_types(self, headers: Optional[Dict[str, str]] = None):
+        """Get LORA types
+
+        Returns:
+            A dictionary containing the LORA types
+        """
+        url = self._urls.get_lora_types
+        return await self._get(url, headers)
+
+    async def get_lora_cates(self, headers: Optional[Dict[str, str]] = None):
+        """Get LORA categories
+
+        Returns:
+            A dictionary containing the LORA categories
+        """
+        url = self._urls.get_lora_cates
+        return await self._get(url, headers)
+
+    async def get_lora_models(self, type: str = None, cate: str = None, headers: Optional[Dict[str, str]] = None):
+        """Get LORA models
+
+        Args:
+            type (str): Type of LoRA model
+            cate (str): Category of LoRA model
+
+        Returns:
+            A dictionary containing the LORA models
+        """
+        # aiohttp does not drop None params like requests does
+        params = {k: v for k, v in (('type', type), ('cate', cate)) if v is not None}
+        url = self._urls.get_lora_models
+        return await self._get(url, headers, params=params)
+
+    async def create_lora_trainer_task(self, prompt: str, images: List[str], headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """Create a LORA training task with the given prompt and images.
+
+        Args:
+            prompt: The text prompt for fine-tuning.
+            images: A list of URLs, local file paths or file objects of images for fine-tuning.
+
+        Returns:
+            A dictionary containing the task ID and other response data.
+        """
+        url = self._urls.create_lora_trainer_task
+
+        handles = []
+        try:
+            form = aiohttp.FormData()
+            for image in images:
+                if isinstance(image, (str, os.PathLike)) and os.path.isfile(image):
+                    handle = open(image, 'rb')
+                    handles.append(handle)
+                    form.add_field('files', handle, filename=os.path.basename(image), content_type='application/octet-stream')
+                else:
+                    form.add_field('files', image, filename='files')
+            form.add_field('prompt', prompt)
+            return await self._post(url, headers, data=form)
+        finally:
+            for handle in handles:
+                handle.close()
+
+    async def get_result_lora_trainer_task(self, task_id: str, headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        """Retrieve the result of a previously submitted LoRA Trainer task.
+
+        Args:
+            task_id: The unique identifier of the LoRA task.
+
+        Returns:
+            A dictionary containing the result of the task.
+        """
+        url = self._urls.get_result_lora_trainer_task
+        return await self._post(url, headers, {"task_id": task_id})
+
+
+class AsyncAudioGeneration(AsyncBaseClient):
+    _paths = _AUDIO_PATHS
+
+    async def create_txt2audio(
+        self,
+        prompt: str,
+        model: str = "musicgen",
+        headers: Optional[Dict[str, str]] = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """Generate audio with prompt.
+
+        Args:
+            prompt (str): The prompt for generation.
+            model (str): The type of model to be used. Default is "musicgen".
+            **kwargs: Additional keyword arguments for the model.
+
+        Returns:
+            A dictionary with the generated audio.
+        """
+        _validate_kwargs(model, kwargs)
+
+        url = self._urls.create_txt2audio
+        payload = {"prompt": prompt, "configs": {"model": model, **kwargs}}
+        return await self._post(url, headers, payload)
+
+    async def result_txt2audio(self, task_id: str, headers: Optional[Dict[str, str]] = None):
+        """Get result of text to audio generation with task_id
+
+        Args:
+            task_id (str): Unique task ID of the text-to-audio generation task.
+
+        Returns:
+            A dictionary with detail response.
+        """
+        url = self._urls.result_txt2audio.format(task_id)
+        return await self._get(url, headers)
@@ -1,16 +1,44 @@
-import requests
-from typing import Any, Dict
+from typing import Any, Dict, Optional
+from flexstack.models.base import BaseClient
 
 
-class AudioGeneration: 
-    def __init__(self, base_url: str) -> None:
-        self.base_url = base_url
+# Endpoint paths relative to the base URL, keyed by method name
+_AUDIO_PATHS = {
+    "create_txt2audio": "/ai/audio_generation",
+    "result_txt2audio": "/ai/audio_generation/{}"
+}
+
+
+# Keyword arguments supported by each audio model
+_AUDIO_KWARGS = {
+    "audiogen": frozenset({"duration", "top_k", "top_p"}),
+    "musicgen": frozenset({"duration", "top_k", "top_p"}),
+    "bark": frozenset()
+}
+
+
+def _validate_kwargs(model: str, kwargs: Dict[str, Any]) -> None:
+    """Check the keyword arguments of an audio model and fill in their defaults."""
+    allowed = _AUDIO_KWARGS[model]
+    invalid = kwargs.keys() - allowed
+    if invalid:
+        raise ValueError(f"Model `{model}` does not support keyword argument: `{'`, `'.join(sorted(invalid))}`. Only suport in [{', '.join(sorted(allowed) + ['prompt', 'model'])}]")
+
+    # Defaut kwargs
+    if model == "audiogen" or model == "musicgen":
+        kwargs.setdefault("duration", 5)
+        kwargs.setdefault("top_k", 15)
+        kwargs.setdefault("top_p", 0.9)
+
+
+class AudioGeneration(BaseClient): 
+    _paths = _AUDIO_PATHS
 
     def create_txt2audio(
         self, 
         prompt: str,
         model: str = "musicgen",
-        headers: dict = {},
+        headers: Optional[Dict[str, str]] = None,
         **kwargs
     ) -> Dict[str, Any]:
         """Generate audio with prompt.
@@ -24,34 +52,15 @@ class AudioGeneration:
             A dictionary with the generated audio.
         """
 
-        _kwargs_valids = {
-            "audiogen": ["duration", "top_k", "top_p"],
-            "musicgen": ["duration", "top_k", "top_p"],
-            "bark": []
-        }
+        _validate_kwargs(model, kwargs)
 
-        # Valid kwargs
-        for k, v in kwargs.items():
-            if k not in _kwargs_valids[model]:
-                raise ValueError(f"Model `{model}` does not support keyword argument: `{k}`. Only suport in [{', '.join(_kwargs_valids[model] + ['prompt', 'model'])}]")
+        url = self._urls.create_txt2audio
+        payload = {"prompt": prompt, "configs": {"model": model, **kwargs}}
+        response = self._post_json(url, payload, headers=headers)
         
-        # Defaut kwargs
-        if model == "audiogen" or model == "musicgen":
-            kwargs["duration"] = 5 if "duration" not in kwargs else kwargs["duration"]
-            kwargs["top_k"] = 15 if "top_k" not in kwargs else kwargs["top_k"]
-            kwargs["top_p"] = 0.9 if "top_p" not in kwargs else kwargs["top_p"]
-
-        url = f"{self.base_url}/ai/audio_generation"
-        configs = dict(
-            model=model
-        )
-        configs.update(kwargs)
-        payload = {"prompt": prompt, "configs": configs}
-        response = requests.post(url, json=payload, headers=headers)
-        
-        return response.json()
+        return self._json(response)
     
-    def result_txt2audio(self, task_id: str, headers: dict = {}):
+    def result_txt2audio(self, task_id: str, headers: Optional[Dict[str, str]] = None):
         """Get result of text to audio generation with task_id
 
         Args:
@@ -61,7 +70,17 @@ class AudioGeneration:
             A dictionary with detail response.
         """
 
-        url = f"{self.base_url}/ai/audio_generation/{task_id}"
-        response = requests.get(url, headers=headers)
-        return response.json()
-    
\ No newline at end of file
+        url = self._urls.result_txt2audio.format(task_id)
+        response = self._get(url, headers=headers)
+        return self._json(response)
+
+    def wait_txt2audio(self, task_id: str, headers: Optional[Dict[str, str]] = None, **kwargs) -> Dict[str, Any]:
+        """Wait for a text to audio generation task to finish, see `wait_for_result` for the polling options.
+
+        Args:
+            task_id: The unique identifier of the text-to-audio task.
+
+        Returns:
+            A dictionary containing the result of the task.
+        """
+        return self.wait_for_result(task_id, lambda t: self.result_txt2audio(t, headers=headers), **kwargs)
@@ -0,0 +1,429 @@
+import copy
+import functools
+import gzip
+import hashlib
+import inspect
+import json
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, Optional, Tuple, Union
+
+# The HTTP libraries are imported on first use, keeping `import flexstack` cheap
+if TYPE_CHECKING:
+    import httpx
+    import requests
+    from urllib3.util.retry import Retry
+
+BACKENDS = frozenset({"requests", "httpx"})
+
+
+@functools.lru_cache(maxsize=None)
+def _orjson() -> Any:
+    try:
+        import orjson
+    except ImportError:
+        return None
+    return orjson
+
+
+def _httpx() -> Any:
+    try:
+        import httpx
+    except ImportError:
+        raise ImportError("The `httpx` backend requires `httpx[http2]`, install it with `pip install flexstack[http2]`") from None
+    return httpx
+
+
+def json_dumps(obj: Any) -> bytes:
+    """Serialize an object to JSON bytes, using `orjson` when it is installed."""
+    orjson = _orjson()
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode("utf-8")
+
+
+def json_loads(data: bytes) -> Any:
+    """Deserialize JSON bytes, using `orjson` when it is installed."""
+    orjson = _orjson()
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def encode_json_body(payload: Any, headers: Optional[Dict[str, str]] = None, gzip_threshold: Optional[int] = None) -> Tuple[bytes, Dict[str, str]]:
+    """Encode a JSON request body, gzipping it when it is larger than `gzip_threshold` bytes.
+
+    Returns:
+        The body, and `headers` extended with its content type and encoding.
+    """
+    body = json_dumps(payload)
+    headers = {**headers, "Content-Type": "application/json"} if headers else {"Content-Type": "application/json"}
+    if gzip_threshold is not None and len(body) > gzip_threshold:
+        # Fastest level, the client is more CPU-bound than the upload
+        body = gzip.compress(body, compresslevel=1)
+        headers["Content-Encoding"] = "gzip"
+    return body, headers
+
+
+# Task statuses after which polling a result no longer changes it
+FINISHED_STATUSES = frozenset({"done", "failed"})
+
+
+def is_finished(result: Dict[str, Any]) -> bool:
+    """Check whether a task result reports a finished task.
+
+    The status is looked up at the top level of the response and inside its `data` field.
+    """
+    return _task_field(result, "status") in FINISHED_STATUSES
+
+
+def _task_field(result: Dict[str, Any], name: str) -> Any:
+    data = result.get("data")
+    return result.get(name) or (data.get(name) if isinstance(data, dict) else None)
+
+
+# Options of the default `Retry` policy. Connect errors are always retried, read
+# errors and 5xx responses only for idempotent methods, so a task is never
+# submitted twice. The last response is returned once retries run out
+DEFAULT_RETRY_OPTIONS = {
+    "total": 5,
+    "connect": 3,
+    "read": 3,
+    "status": 3,
+    "backoff_factor": 0.3,
+    "status_forcelist": (429, 500, 502, 503, 504),
+    "allowed_methods": frozenset({"HEAD", "GET", "PUT", "DELETE", "OPTIONS", "TRACE"}),
+    "respect_retry_after_header": True,
+    "raise_on_status": False
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _retry_class() -> type:
+    from urllib3.util.retry import Retry
+
+    class TaskRetry(Retry):
+        """A `Retry` that also retries other methods, such as POST, when the server
+        rejected the request with a 429 or 503 and a Retry-After header."""
+
+        def is_retry(self, method: str, status_code: int, has_retry_after: bool = False) -> bool:
+            if self.allowed_methods and method.upper() not in self.allowed_methods:
+                return bool(
+                    self.total
+                    and self.respect_retry_after_header
+                    and has_retry_after
+                    and status_code in (429, 503)
+                )
+            return super().is_retry(method, status_code, has_retry_after)
+
+    return TaskRetry
+
+
+def ttl_cache(ttl: float) -> Callable:
+    """Cache a client method's result per client and arguments for `ttl` seconds.
+
+    The decorated method returns the HTTP response, and the wrapper returns its
+    decoded JSON. Error responses are returned without being cached.
+
+    Entries are also keyed by the session's `Authorization` header, so logging in
+    again does not return results fetched with other credentials.
+    """
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            # Bind the arguments so `headers` is keyed the same whether passed by position or keyword
+            bound = signature.bind(self, *args, **kwargs)
+            bound.apply_defaults()
+            arguments = tuple(
+                (name, frozenset(value.items()) if isinstance(value, dict) else value)
+                for name, value in bound.arguments.items() if name != "self"
+            )
+            key = (func.__name__, self._session.headers.get("Authorization"), arguments)
+            now = time.monotonic()
+            entry = self._metadata_cache.get(key)
+            if entry is not None and now - entry[0] < ttl:
+                # Copied in and out, so callers cannot change the cached entry
+                return copy.deepcopy(entry[1])
+            response = func(self, *args, **kwargs)
+            result = self._json(response)
+            if response.status_code < 400:
+                self._metadata_cache[key] = (now, copy.deepcopy(result))
+            return result
+        return wrapper
+    return decorator
+
+
+def create_session(retries: Union["Retry", int, None] = None) -> "requests.Session":
+    """Create a requests session with a pooled, retrying HTTP adapter.
+
+    Args:
+        retries: Retry policy of the adapter, as a `Retry` or a number of retries. Defaults to a `Retry` built from `DEFAULT_RETRY_OPTIONS`.
+
+    Returns:
+        A new `requests.Session`.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+
+    # Keep-alive connections are reused across calls to the same host
+    adapter = HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=20,
+        max_retries=_retry_class()(**DEFAULT_RETRY_OPTIONS) if retries is None else retries
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def create_http2_client(retries: Optional[int] = None) -> "httpx.Client":
+    """Create an `httpx` client that multiplexes concurrent requests over HTTP/2 connections.
+
+    Args:
+        retries: Number of retries on connection errors, the only failures `httpx` retries. Defaults to the `connect` count of `DEFAULT_RETRY_OPTIONS`.
+
+    Returns:
+        A new `httpx.Client`.
+    """
+    httpx = _httpx()
+    transport = httpx.HTTPTransport(
+        http2=True,
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=100),
+        retries=DEFAULT_RETRY_OPTIONS["connect"] if retries is None else retries
+    )
+    return httpx.Client(transport=transport)
+
+
+class BaseClient:
+    """Base class for the model clients, holding a pooled HTTP session.
+
+    The session is a `requests.Session` by default, or an HTTP/2 `httpx.Client`
+    with `backend="httpx"`, which helps when polling many tasks at once. Unless
+    one is passed in, it is only created when the first request is made, or taken
+    from the `parent` client then.
+
+    Attributes:
+        base_url (str): The base URL for the FlexStack API.
+    """
+
+    # Maximum number of task submissions remembered by `_remember_submission`
+    submit_cache_maxsize = 256
+
+    # Endpoint paths relative to `base_url`, keyed by method name
+    _paths: Dict[str, str] = {}
+
+    def __init__(
+        self,
+        base_url: str,
+        session: Optional["requests.Session"] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Tuple[float, float] = (5.0, 60.0),
+        retries: Union["Retry", int, None] = None,
+        backend: str = "requests",
+        parent: Optional["BaseClient"] = None,
+        gzip_threshold: Optional[int] = 2048
+    ) -> None:
+        """Initialize the client.
+
+        Args:
+            base_url: The base URL for the FlexStack API.
+            session: An existing session to share with other clients, matching `backend`. A new one is created if omitted.
+            headers: Headers to send with every request, set once on the session.
+            timeout: The (connect, read) timeout in seconds for each request.
+            retries: Retry policy of a newly created session, see `create_session`, or a number of connect retries with the `httpx` backend. Ignored when `session` is given.
+            backend: The HTTP library to use, "requests" or "httpx".
+            parent: A client whose session is shared, looked up on the first request. Takes precedence over `session`.
+            gzip_threshold: Size in bytes above which large JSON bodies, such as chat histories, are gzipped. `None` disables compression, for servers that do not accept gzip request bodies.
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"backend must be one of {sorted(BACKENDS)}")
+        if backend == "httpx" and not (retries is None or isinstance(retries, int)):
+            raise ValueError("The `httpx` backend only supports a number of connect retries")
+
+        self.base_url = base_url
+        self._backend = backend
+        self._owns_session = session is None and parent is None
+        if backend == "httpx":
+            httpx = _httpx()
+            self._timeout = httpx.Timeout(timeout[1], connect=timeout[0])
+            self._stream_timeout = httpx.Timeout(None, connect=timeout[0])
+        else:
+            self._timeout = timeout
+            # Only bound the connect for long-lived streams
+            self._stream_timeout = (timeout[0], None)
+        self._retries = retries
+        self.gzip_threshold = gzip_threshold
+        self._headers = dict(headers) if headers else {}
+        self._parent = parent
+        self._http_session = None if parent is not None else session
+        if self._http_session is not None and headers:
+            self._http_session.headers.update(headers)
+        self._submit_cache = OrderedDict()
+        self._submit_keys = {}
+        self._metadata_cache = {}
+
+    @property
+    def base_url(self) -> str:
+        return self._base_url
+
+    @base_url.setter
+    def base_url(self, base_url: str) -> None:
+        # Rebuild the endpoint URLs, and drop metadata fetched from the previous host
+        self._base_url = base_url
+        self._urls = SimpleNamespace(**{name: base_url + path for name, path in self._paths.items()})
+        if hasattr(self, "_metadata_cache"):
+            self.invalidate_metadata()
+
+    @property
+    def _session(self) -> "requests.Session":
+        if self._http_session is None:
+            if self._parent is not None:
+                session = self._parent._session
+            elif self._backend == "httpx":
+                session = create_http2_client(self._retries)
+            else:
+                session = create_session(self._retries)
+            session.headers.update(self._headers)
+            self._http_session = session
+        return self._http_session
+
+    def _submission_key(self, url: str, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> str:
+        # Keyed by the credentials too, so a task is never handed to another account
+        auth = (headers or {}).get("Authorization") or self._session.headers.get("Authorization")
+        return hashlib.blake2b(json.dumps({"u": url, "p": payload, "a": auth}, sort_keys=True).encode()).hexdigest()
+
+    def _get_submission(self, key: str) -> Optional[Dict[str, Any]]:
+        result = self._submit_cache.get(key)
+        if result is not None:
+            self._submit_cache.move_to_end(key)
+            # Copied in and out, so callers cannot change the cached entry
+            result = copy.deepcopy(result)
+        return result
+
+    def _remember_submission(self, key: str, result: Dict[str, Any]) -> None:
+        self._submit_cache[key] = copy.deepcopy(result)
+        self._submit_cache.move_to_end(key)
+        task_id = _task_field(result, "task_id")
+        if task_id is not None:
+            self._submit_keys[task_id] = key
+        if len(self._submit_cache) > self.submit_cache_maxsize:
+            _, evicted = self._submit_cache.popitem(last=False)
+            self._submit_keys.pop(_task_field(evicted, "task_id"), None)
+
+    def _forget_failed_submission(self, task_id: str, result: Dict[str, Any]) -> None:
+        # A failed task must not be handed out again for a retried submission
+        if _task_field(result, "status") == "failed":
+            key = self._submit_keys.pop(task_id, None)
+            if key is not None:
+                self._submit_cache.pop(key, None)
+
+    def _get(self, url: str, **kwargs) -> "requests.Response":
+        kwargs.setdefault("timeout", self._timeout)
+        return self._session.get(url, **kwargs)
+
+    def _post(self, url: str, **kwargs) -> "requests.Response":
+        kwargs.setdefault("timeout", self._timeout)
+        return self._session.post(url, **kwargs)
+
+    def _json_request(self, payload: Any, headers: Optional[Dict[str, str]], compress: bool) -> Dict[str, Any]:
+        body, headers = encode_json_body(payload, headers, self.gzip_threshold if compress else None)
+        # httpx takes a raw body as `content`, requests as `data`
+        return {"content" if self._backend == "httpx" else "data": body, "headers": headers}
+
+    def _post_json(self, url: str, payload: Any, headers: Optional[Dict[str, str]] = None, compress: bool = False, **kwargs) -> "requests.Response":
+        return self._post(url, **self._json_request(payload, headers, compress), **kwargs)
+
+    @contextmanager
+    def _stream_json(self, url: str, payload: Any, headers: Optional[Dict[str, str]] = None, compress: bool = False) -> Iterator["requests.Response"]:
+        kwargs = self._json_request(payload, headers, compress)
+        if self._backend == "httpx":
+            with self._session.stream("POST", url, timeout=self._stream_timeout, **kwargs) as response:
+                yield response
+        else:
+            with self._session.post(url, stream=True, timeout=self._stream_timeout, **kwargs) as response:
+                yield response
+
+    def _iter_lines(self, response: "requests.Response", chunk_size: int = 65536) -> Iterator[bytes]:
+        if self._backend != "httpx":
+            yield from response.iter_lines(chunk_size=chunk_size)
+            return
+
+        # httpx only iterates decoded lines, so split the raw bytes here. Without a
+        # chunk size each piece is yielded as it arrives instead of being buffered
+        pending = b""
+        for chunk in response.iter_bytes():
+            lines = (pending + chunk).splitlines(keepends=True)
+            # The last line may continue in the next chunk, as may a "\r\n" split after "\r"
+            pending = lines.pop() if lines and not lines[-1].endswith(b"\n") else b""
+            for line in lines:
+                yield line.rstrip(b"\r\n")
+        if pending:
+            yield pending.rstrip(b"\r\n")
+
+    @staticmethod
+    def _json(response: "requests.Response") -> Any:
+        return json_loads(response.content)
+
+    def invalidate(self) -> None:
+        """Forget all cached task submissions."""
+        self._submit_cache.clear()
+        self._submit_keys.clear()
+
+    def invalidate_metadata(self) -> None:
+        """Forget all cached metadata, such as model and LoRA listings."""
+        self._metadata_cache.clear()
+
+    def wait_for_result(
+        self,
+        task_id: str,
+        poll_fn: Callable[[str], Dict[str, Any]],
+        *,
+        initial: float = 0.5,
+        factor: float = 1.5,
+        max_interval: float = 10.0,
+        timeout: float = 600.0
+    ) -> Dict[str, Any]:
+        """Poll a task until it finishes, backing off exponentially between polls.
+
+        Args:
+            task_id: The unique identifier of the task.
+            poll_fn: The result method to poll, called with the task ID (e.g. `self.result_txt2img`).
+            initial: Delay in seconds before the second poll.
+            factor: Multiplier applied to the delay after each poll.
+            max_interval: Upper bound in seconds for the delay between polls.
+            timeout: Maximum time in seconds to wait for the task.
+
+        Returns:
+            The last result returned by `poll_fn`.
+
+        Raises:
+            TimeoutError: If the task is not finished within `timeout` seconds.
+        """
+        deadline = time.monotonic() + timeout
+        delay = initial
+        while True:
+            result = poll_fn(task_id)
+            if is_finished(result):
+                return result
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"Task `{task_id}` did not finish within {timeout} seconds")
+            time.sleep(min(delay, max_interval, remaining))
+            delay *= factor
+
+    def close(self) -> None:
+        """Close the underlying HTTP session if this client created it."""
+        if self._owns_session and self._http_session is not None:
+            self._http_session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
@@ -1,11 +1,49 @@
+import functools
 import os
-from typing import Any, Dict, List
-import requests
+from typing import Any, Dict, List, Optional
+from flexstack.models.base import BaseClient, ttl_cache
 
 
-class ImageGeneration: 
-    def __init__(self, base_url: str):
-        self.base_url = base_url
+@functools.lru_cache(maxsize=None)
+def _multipart_encoder() -> Any:
+    # `requests_toolbelt` imports `requests`, so only look it up for an upload
+    try:
+        from requests_toolbelt import MultipartEncoder
+    except ImportError:
+        return None
+    return MultipartEncoder
+
+
+# Endpoint paths relative to the base URL, keyed by method name
+_IMAGE_PATHS = {
+    "create_sd_task": "/ai/create_sd_task",
+    "get_result_sd_task": "/ai/get_result_sd_task",
+    "create_sdxl_task": "/ai/create_sdxl_task",
+    "get_result_sdxl_task": "/ai/get_result_sdxl_task",
+    "create_txt2img": "/ai/image_generation",
+    "result_txt2img": "/ai/image_generation/{}",
+    "create_txt2vid": "/ai/video_generation",
+    "result_txt2vid": "/ai/video_generation/{}",
+    "get_lora_types": "/lora/types",
+    "get_lora_cates": "/lora/cates",
+    "get_lora_models": "/lora/",
+    "create_lora_trainer_task": "/ai/create_lora_trainner_task",
+    "get_result_lora_trainer_task": "/ai/get_result_lora_trainner_task"
+}
+
+# Task kinds routed through `_create_task`/`_get_result`: the `_IMAGE_PATHS` keys of
+# their create and result endpoints, and whether the result is fetched by POSTing the task ID
+_TASKS = {
+    "sd": ("create_sd_task", "get_result_sd_task", True),
+    "sdxl": ("create_sdxl_task", "get_result_sdxl_task", True),
+    "txt2img": ("create_txt2img", "result_txt2img", False),
+    "txt2vid": ("create_txt2vid", "result_txt2vid", False),
+    "lora_trainer": ("create_lora_trainer_task", "get_result_lora_trainer_task", True)
+}
+
+
+class ImageGeneration(BaseClient): 
+    _paths = _IMAGE_PATHS
 
     @staticmethod
     def create_config(rotation: str = "square", steps: int = 50, negative_prompt: str = "", enhance_prompt: bool = False) -> Dict[str, Any]:
@@ -27,8 +65,34 @@ class ImageGeneration:
             "enhance_prompt": enhance_prompt        
         }
     
+    def _create_task(self, kind: str, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None, cache: bool = False) -> Dict[str, Any]:
+        url = getattr(self._urls, _TASKS[kind][0])
+
+        key = self._submission_key(url, payload, headers) if cache else None
+        if key is not None:
+            result = self._get_submission(key)
+            if result is not None:
+                return result
+
+        response = self._post_json(url, payload, headers=headers)
+        result = self._json(response)
+        if key is not None and response.status_code < 400:
+            self._remember_submission(key, result)
+        return result
+
+    def _get_result(self, kind: str, task_id: str, headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+        _, name, by_post = _TASKS[kind]
+        url = getattr(self._urls, name)
+        if by_post:
+            response = self._post_json(url, {"task_id": task_id}, headers=headers)
+        else:
+            response = self._get(url.format(task_id), headers=headers)
+        result = self._json(response)
+        self._forget_failed_submission(task_id, result)
+        return result
+
     # IMAGE ============
-    def create_sd_task(self, prompt: str, rotation: str = "square", steps: int = 50, negative_prompt: str = "", enhance_prompt: bool = False, headers: dict = {}) -> Dict[str, Any]:
+    def create_sd_task(self, prompt: str, rotation: str = "square", steps: int = 50, negative_prompt: str = "", enhance_prompt: bool = False, headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
         """Create an SD1.5 image task with a prompt and configuration.
         
         Args:
@@ -41,12 +105,9 @@ class ImageGeneration:
             A dictionary with the task creation response.
         """
         config = ImageGeneration.create_config(rotation, steps, negative_prompt, enhance_prompt)
-        url = f"{self.base_url}/ai/create_sd_task"
-        payload = {"prompt": prompt, "config": config}
-        response = requests.post(url, json=payload, headers=headers)
-        return response.json()
+        return self._create_task("sd", {"prompt": prompt, "config": config}, headers)
     
-    def get_result_sd_task(self, task_id: str, headers: dict = {}) -> Dict[str, Any]:
+    def get_result_sd_task(self, task_id: str, headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
         """Retrieve the result of a previously submitted SD task.
         
         Args:
@@ -55,12 +116,20 @@ class ImageGeneration:
         Returns:
             A dictionary containing the result of the task.
         """
-        url = f"{self.base_url}/ai/get_result_sd_task"
-        payload = {"task_id": task_id}
-        response = requests.post(url, json=payload, headers=headers)
-        return response.json()
+        return self._get_result("sd", task_id, headers)
     
-    def create_sdxl_task(self, prompt: str, rotation: str = "square", steps: int = 50, negative_prompt: str = "", enhance_prompt: bool = False, headers:dict = {}) -> Dict[str, Any]:
+    def wait_sd(self, task_id: str, headers: Optional[Dict[str, str]] = None, **kwargs) -> Dict[str, Any]:
+        """Wait for a previously submitted SD task to finish, see `wait_for_result` for the polling options.
+
+        Args:
+            task_id: The unique identifier of the SD task.
+
+        Returns:
+            A dictionary containing the result of the task.
+        """
+        return self.wait_for_result(task_id, lambda t: self.get_result_sd_task(t, headers=headers), **kwargs)
+    
+    def create_sdxl_task(self, prompt: str, rotation: str = "square", steps: int = 50, negative_prompt: str = "", enhance_prompt: bool = False, headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
         """Create an SDXL-turbo image task with a prompt and configuration.
         
         Args:
@@ -73,12 +142,9 @@ class ImageGeneration:
             A dictionary with the task creation response.
         """
         config = ImageGeneration.create_config(rotation, steps, negative_prompt, enhance_prompt)
-        url = f"{self.base_url}/ai/create_sdxl_task"
-        payload = {"prompt": prompt, "config": config}
-        response = requests.post(url, json=payload, headers=headers)
-        return response.json()
+        return self._create_task("sdxl", {"prompt": prompt, "config": config}, headers)
     
-    def get_result_sdxl_task(self, task_id: str, headers: dict = {}) -> Dict[str, Any]:
+    def get_result_sdxl_task(self, task_id: str, headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
         """Retrieve the result of a previously submitted SDXL Turbo task.
         
         Args:
@@ -87,10 +153,18 @@ class ImageGeneration:
         Returns:
             A dictionary containing the result of the task.
         """
-        url = f"{self.base_url}/ai/get_result_sdxl_task"
-        payload = {"task_id": task_id}
-        response = requests.post(url, json=payload, headers=headers)
-        return response.json()
+        return self._get_result("sdxl", task_id, headers)
+    
+    def wait_sdxl(self, task_id: str, headers: Optional[Dict[str, str]] = None, **kwargs) -> Dict[str, Any]:
+        """Wait for a previously submitted SDXL Turbo task to finish, see `wait_for_result` for the polling options.
+
+        Args:
+            task_id: The unique identifier of the SDXL Turbo task.
+
+        Returns:
+            A dictionary containing the result of the task.
+        """
+        return self.wait_for_result(task_id, lambda t: self.get_result_sdxl_task(t, headers=headers), **kwargs)
     
     def create_txt2img(
         self,
@@ -103,7 +177,8 @@ class ImageGeneration:
         seed: int = -1,
         negative_prompt: str = "",
         enhance_prompt: bool = False,
-        headers: dict = {}
+        headers: Optional[Dict[str, str]] = None,
+        cache: bool = True
     ) -> Dict[str, Any]:
         """Create an text to image generation task with a prompt and configuration.
 
@@ -117,21 +192,20 @@ class ImageGeneration:
             seed (int): Random seed for image generation
             negative_prompt (str): Prompt for generating negative examples.
             enhance_prompt (bool): Whether to enhance the prompt or not. Default is False.
+            cache (bool): Reuse the previous task for an identical request with a fixed seed and credentials, unless it was seen failing. Default is True.
 
         Returns:
             A dictionary with the task creation response.
         """
 
-        configs = dict(
-            model=model, lora=lora, height=height, ưidth=width, steps=steps, negative_prompt=negative_prompt, seed=seed, enhance_prompt=enhance_prompt
-        )
-        url = f"{self.base_url}/ai/image_generation"
-        payload = {"prompt": prompt, "configs": configs}
-        response = requests.post(url, json=payload, headers=headers)
+        configs = {
+            "model": model, "lora": lora, "height": height, "width": width, "steps": steps, "negative_prompt": negative_prompt, "seed": seed, "enhance_prompt": enhance_prompt
+        }
 
-        return response.json()
+        # A fixed seed yields the same image, so reuse the previous task
+        return self._create_task("txt2img", {"prompt": prompt, "configs": configs}, headers, cache=cache and seed != -1)
     
-    def result_txt2img(self, task_id: str, headers: dict = {}):
+    def result_txt2img(self, task_id: str, headers: Optional[Dict[str, str]] = None):
         """Get result of text to image generation with task_id
 
         Args:
@@ -140,9 +214,18 @@ class ImageGeneration:
         Returns:
             A dictionary with detail response.
         """
-        url = f"{self.base_url}/ai/image_generation/{task_id}"
-        response = requests.get(url, headers=headers)
-        return response.json()
+        return self._get_result("txt2img", task_id, headers)
+    
+    def wait_txt2img(self, task_id: str, headers: Optional[Dict[str, str]] = None, **kwargs) -> Dict[str, Any]:
+        """Wait for a text to image generation task to finish, see `wait_for_result` for the polling options.
+
+        Args:
+            task_id: The unique identifier of the text-to-image task.
+
+        Returns:
+            A dictionary containing the result of the task.
+        """
+        return self.wait_for_result(task_id, lambda t: self.result_txt2img(t, headers=headers), **kwargs)
     
     # VIDEO ============
     def create_txt2vid(
@@ -157,7 +240,8 @@ class ImageGeneration:
         seed: int = -1,
         negative_prompt: str = "",
         enhance_prompt: bool = False,
-        headers: dict = {}
+        headers: Optional[Dict[str, str]] = None,
+        cache: bool = True
     ) -> Dict[str, Any]:
         """Create an text to video generation task with a prompt and configuration.
 
@@ -172,19 +256,19 @@ class ImageGeneration:
             seed (int): Random seed for video generation
             negative_prompt (str): Prompt for generating negative examples.
             enhance_prompt (bool): Whether to enhance the prompt or not. Default is False.
+            cache (bool): Reuse the previous task for an identical request with a fixed seed and credentials, unless it was seen failing. Default is True.
 
         Returns:
             A dictionary with the task creation response.
         """
-        configs = dict(
-            model=model, width=width, height=height, fps=fps, num_frames=num_frames, steps=steps, negative_prompt=negative_prompt, seed=seed, enhance_prompt=enhance_prompt
-        )
-        url = f"{self.base_url}/ai/video_generation"
-        payload = {"prompt": prompt, "configs": configs}
-        response = requests.post(url, json=payload, headers=headers)
-        return response.json()
-
-    def result_txt2vid(self, task_id: str, headers: dict = {}):
+        configs = {
+            "model": model, "width": width, "height": height, "fps": fps, "num_frames": num_frames, "steps": steps, "negative_prompt": negative_prompt, "seed": seed, "enhance_prompt": enhance_prompt
+        }
+
+        # A fixed seed yields the same video, so reuse the previous task
+        return self._create_task("txt2vid", {"prompt": prompt, "configs": configs}, headers, cache=cache and seed != -1)
+
+    def result_txt2vid(self, task_id: str, headers: Optional[Dict[str, str]] = None):
         """Get result of text to video generation with task_id
 
         Args:
@@ -193,34 +277,43 @@ class ImageGeneration:
         Returns:
             A dictionary with detail response.
         """
-        url = f"{self.base_url}/ai/video_generation/{task_id}"
-        response = requests.get(url, headers=headers)
-        return response.json()
+        return self._get_result("txt2vid", task_id, headers)
+    
+    def wait_txt2vid(self, task_id: str, headers: Optional[Dict[str, str]] = None, **kwargs) -> Dict[str, Any]:
+        """Wait for a text to video generation task to finish, see `wait_for_result` for the polling options.
+
+        Args:
+            task_id: The unique identifier of the text-to-video task.
+
+        Returns:
+            A dictionary containing the result of the task.
+        """
+        return self.wait_for_result(task_id, lambda t: self.result_txt2vid(t, headers=headers), **kwargs)
     
     # LORA ============
-    def get_lora_types(self, headers: dict = {}):
+    @ttl_cache(ttl=300)
+    def get_lora_types(self, headers: Optional[Dict[str, str]] = None):
         """Get LORA types
         
         Returns:
             A dictionary containing the LORA types
         """
 
-        url = f"{self.base_url}/lora/types"
-        response = requests.get(url, headers=headers)
-        return response.json()
+        url = self._urls.get_lora_types
+        return self._get(url, headers=headers)
     
-    def get_lora_cates(self, headers: dict = {}):
+    @ttl_cache(ttl=300)
+    def get_lora_cates(self, headers: Optional[Dict[str, str]] = None):
         """Get LORA categories
 
         Returns:
             A dictionary containing the LORA categories
         """
 
-        url = f"{self.base_url}/lora/cates"
-        response = requests.get(url, headers=headers)
-        return response.json()     
+        url = self._urls.get_lora_cates
+        return self._get(url, headers=headers)
 
-    def get_lora_models(self, type: str = None, cate: str = None, headers: dict = {}):
+    def get_lora_models(self, type: str = None, cate: str = None, headers: Optional[Dict[str, str]] = None):
         """Get LORA models
         
         Args:
@@ -232,33 +325,53 @@ class ImageGeneration:
         
         """
 
-        params = {}
-        params['type'] = type
-        params['cate'] = cate
+        params = {k: v for k, v in (('type', type), ('cate', cate)) if v is not None}
 
-        url = f"{self.base_url}/lora/"
-        response = requests.get(url, headers=headers, params=params)
-        return response.json()
+        url = self._urls.get_lora_models
+        response = self._get(url, headers=headers, params=params)
+        return self._json(response)
     
-    def create_lora_trainer_task(self, prompt: str, images: List[str], headers: dict = {}) -> Dict[str, Any]:
+    def create_lora_trainer_task(self, prompt: str, images: List[str], headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
         """Create a LORA training task with the given prompt and images.
 
         Args:
             prompt: The text prompt for fine-tuning.
-            images: A list of URLs pointing to images for fine-tuning.
+            images: A list of URLs, local file paths or file objects of images for fine-tuning.
 
         Returns:
             A dictionary containing the task ID and other response data.
         """
-        url = f"{self.base_url}/ai/create_lora_trainner_task"
+        url = self._urls.create_lora_trainer_task
 
-        files = [('files', image) for image in images]
-        data = {'prompt': (None, prompt)}
+        handles = []
+        try:
+            fields = []
+            for image in images:
+                if isinstance(image, (str, os.PathLike)) and os.path.isfile(image):
+                    handle = open(image, 'rb')
+                    handles.append(handle)
+                    fields.append(('files', (os.path.basename(image), handle, 'application/octet-stream')))
+                else:
+                    fields.append(('files', ('files', image)))
 
-        response = requests.post(url, files=files + list(data.items()), headers=headers)
-        return response.json()
+            MultipartEncoder = None if self._backend == "httpx" else _multipart_encoder()
+            if self._backend == "httpx":
+                # httpx streams file objects itself
+                response = self._post(url, data={'prompt': prompt}, files=fields, headers=headers)
+            elif MultipartEncoder is None:
+                fields.append(('prompt', (None, prompt)))
+                response = self._post(url, files=fields, headers=headers)
+            else:
+                # Stream the files from disk instead of buffering the whole body
+                fields.append(('prompt', (None, prompt)))
+                encoder = MultipartEncoder(fields=fields)
+                response = self._post(url, data=encoder, headers={**(headers or {}), 'Content-Type': encoder.content_type})
+        finally:
+            for handle in handles:
+                handle.close()
+        return self._json(response)
     
-    def get_result_lora_trainer_task(self, task_id: str, headers: dict = {}) -> Dict[str, Any]:
+    def get_result_lora_trainer_task(self, task_id: str, headers: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
         """Retrieve the result of a previously submitted LoRA Trainer task.
         
         Args:
@@ -267,8 +380,15 @@ class ImageGeneration:
         Returns:
             A dictionary containing the result of the task.
         """
-        url = f"{self.base_url}/ai/get_result_lora_trainner_task"
-        payload = {"task_id": task_id}
-        response = requests.post(url, json=payload, headers=headers)
-        return response.json()
+        return self._get_result("lora_trainer", task_id, headers)
+
+    def wait_lora_trainer_task(self, task_id: str, headers: Optional[Dict[str, str]] = None, **kwargs) -> Dict[str, Any]:
+        """Wait for a previously submitted LoRA Trainer task to finish, see `wait_for_result` for the polling options.
 
+        Args:
+            task_id: The unique identifier of the LoRA task.
+
+        Returns:
+            A dictionary containing the result of the task.
+        """
+        return self.wait_for_result(task_id, lambda t: self.get_result_lora_trainer_task(t, headers=headers), **kwargs)
@@ -1,28 +1,37 @@
-import requests
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+from flexstack.models.base import BaseClient, ttl_cache
 
-class FlexstackInfo: 
-    def __init__(self, base_url: str):
-        self.base_url = base_url
 
-    def get_all_models(self, headers: dict = {}):
+# Endpoint paths relative to the base URL, keyed by method name
+_INFO_PATHS = {
+    "get_all_models": "/ai/models",
+    "get_models": "/models/{}"
+}
+
+_VALID_TASKS = frozenset({
+    'image_generation', 'video_generation', 'text_completion', 'audio_generation', 'text_embedding'
+})
+
+
+class FlexstackInfo(BaseClient): 
+    _paths = _INFO_PATHS
+
+    @ttl_cache(ttl=300)
+    def get_all_models(self, headers: Optional[Dict[str, str]] = None):
         """Get all models"""
-        url = f"{self.base_url}/ai/models"
-        response = requests.get(url, headers=headers)
-        return response.json()
+        url = self._urls.get_all_models
+        return self._get(url, headers=headers)
     
-    def get_models(self, task: str, headers: dict = {}):
+    @ttl_cache(ttl=300)
+    def get_models(self, task: str, headers: Optional[Dict[str, str]] = None):
         """Get models of a task
         
         Args:
             task (str): Task name
         """
 
-        if task not in [
-            'image_generation', 'video_generation', 'text_completion', 'audio_generation', 'text_embedding'
-        ]:
-            raise ValueError('task must be one of ["image_generation", "video_generation", "text_completion", "audio_generation", "text_embedding"]')
+        if task not in _VALID_TASKS:
+            raise ValueError(f"task must be one of {sorted(_VALID_TASKS)}")
         
-        url = f"{self.base_url}/models/{task}"
-        response = requests.get(url, headers=headers)
-        return response.json()
\ No newline at end of file
+        url = self._urls.get_models.format(task)
+        return self._get(url, headers=headers)
\ No newline at end of file
@@ -1,12 +1,34 @@
-import requests
-from typing import Dict, Any
+from typing import Dict, Any, Iterator, Optional, Union
+from flexstack.models.base import BaseClient
 
 
-class TextGeneration: 
-    def __init__(self, base_url: str):
-        self.base_url = base_url
+# Endpoint paths relative to the base URL, keyed by method name
+_TEXT_PATHS = {
+    "text_generation": "/ai/text_completion",
+    "generate_text_stream": "/ai/text_completion?stream=true",
+    "create_text_embedding": "/ai/text_embedding",
+    "result_text_embedding": "/ai/text_embedding/{}"
+}
 
 
+_REQUIRED_KEYS = frozenset({'role', 'content'})
+_ALLOWED_ROLES = frozenset({'system', 'user', 'assistant'})
+
+
+def _validate_messages(messages: list) -> None:
+    """Check that messages are a list of {'role', 'content'} dicts with a known role."""
+    if not isinstance(messages, list):
+        raise ValueError("Messages must be a list. Example: [{'role': 'user', 'content': 'Hello'}]")
+    for message in messages:
+        if message.keys() != _REQUIRED_KEYS:
+            raise ValueError("Message must contain 'role' and 'content'. Example: [{'role': 'user', 'content': 'Hello'}]")
+        if message['role'] not in _ALLOWED_ROLES:
+            raise ValueError("Message role must be 'system', 'user' or 'assistant'. Example: [{'role': 'user', 'content': 'Hello'}]")
+
+
+class TextGeneration(BaseClient): 
+    _paths = _TEXT_PATHS
+
     def text_generation(
         self, 
         messages: list,
@@ -15,7 +37,7 @@ class TextGeneration:
         top_k: int = 50,
         top_p: float = 0.95,
         max_tokens: int = 256,
-        headers: dict = {}
+        headers: Optional[Dict[str, str]] = None
     ) -> Dict[str, Any]:
         """Generate text with messages input.
 
@@ -30,23 +52,16 @@ class TextGeneration:
         Returns:
             A dictionary with the generated text.
         """
-        if not isinstance(messages, list):
-            raise ValueError("Messages must be a list. Example: [{'role': 'user', 'content': 'Hello'}]")
-        for message in messages:
-            keys = list(message.keys())
-            if set(keys) != set(['role', 'content']):
-                raise ValueError("Message must contain 'role' and 'content'. Example: [{'role': 'user', 'content': 'Hello'}]")
-            if message['role'] not in ['system', 'user', 'assistant']:
-                raise ValueError("Message role must be 'system', 'user' or 'assistant'. Example: [{'role': 'user', 'content': 'Hello'}]")
-        
-        url = f"{self.base_url}/ai/text_completion"
-        configs = dict(
-            model=model, temperature=temperature, top_k=top_k, top_p=top_p, max_new_tokens=max_tokens
-        )
+        _validate_messages(messages)
+
+        url = self._urls.text_generation
+        configs = {
+            "model": model, "temperature": temperature, "top_k": top_k, "top_p": top_p, "max_new_tokens": max_tokens
+        }
         payload = {"messages": messages, "configs": configs}
-        response = requests.post(url, json=payload, headers=headers)
+        response = self._post_json(url, payload, headers=headers, compress=True)
         
-        return response.json()
+        return self._json(response)
 
     def generate_text_stream(
         self, 
@@ -56,8 +71,9 @@ class TextGeneration:
         top_k: int = 50,
         top_p: float = 0.95,
         max_tokens: int = 256, 
-        headers: dict = {}
-    ):
+        headers: Optional[Dict[str, str]] = None,
+        decode: bool = False
+    ) -> Iterator[Union[bytes, str]]:
         
         """Generate text with messages input in streaming.
 
@@ -68,32 +84,27 @@ class TextGeneration:
             top_k (int): Top-k for generation. Default is 50.
             top_p (float): Top-p for generation. Default is 0.95.
             max_tokens (int): Max tokens for generation. Default is 256.
+            decode (bool): Whether to decode the lines to str. Default is False.
         
-        Returns:
-            A dictionary with the generated text.
+        Yields:
+            Non-empty lines of the streamed response, as bytes unless `decode` is True.
         """
-        if not isinstance(messages, list):
-            raise ValueError("Messages must be a list. Example: [{'role': 'user', 'content': 'Hello'}]")
-        for message in messages:
-            keys = list(message.keys())
-            if set(keys) != set(['role', 'content']):
-                raise ValueError("Message must contain 'role' and 'content'. Example: [{'role': 'user', 'content': 'Hello'}]")
-            if message['role'] not in ['system', 'user', 'assistant']:
-                raise ValueError("Message role must be 'system', 'user' or 'assistant'. Example: [{'role': 'user', 'content': 'Hello'}]")
-            
-        url = f"{self.base_url}/ai/text_completion?stream=true"
-        configs = dict(
-            model=model, temperature=temperature, top_k=top_k, top_p=top_p, max_new_tokens=max_tokens
-        )
+        _validate_messages(messages)
+
+        url = self._urls.generate_text_stream
+        configs = {
+            "model": model, "temperature": temperature, "top_k": top_k, "top_p": top_p, "max_new_tokens": max_tokens
+        }
         
         payload = {"messages": messages, "configs": configs}
-        with requests.post(url, json=payload, stream=True, headers=headers) as response:
+        with self._stream_json(url, payload, headers=headers, compress=True) as response:
             response.raise_for_status()
-            for line in response.iter_lines():
+            # Large reads keep syscalls down; decoding is left to the caller
+            for line in self._iter_lines(response):
                 if line:
-                    yield line
+                    yield line.decode("utf-8") if decode else line
 
-    def create_text_embedding(self, text: str, model: str="mistral", headers: dict={}):
+    def create_text_embedding(self, text: str, model: str="mistral", headers: Optional[Dict[str, str]] = None):
         """Create text embedding
 
         Args:
@@ -103,15 +114,12 @@ class TextGeneration:
         Returns:
             A dictionary with the generated embedding.
         """
-        url = f"{self.base_url}/ai/text_embedding"
-        configs = dict(
-            model=model
-        )
-        payload = {"text": text, "configs": configs}
-        response = requests.post(url, json=payload, headers=headers)
-        return response.json()
-
-    def result_text_embedding(self, task_id: str, headers: dict={}):
+        url = self._urls.create_text_embedding
+        payload = {"text": text, "configs": {"model": model}}
+        response = self._post_json(url, payload, headers=headers)
+        return self._json(response)
+
+    def result_text_embedding(self, task_id: str, headers: Optional[Dict[str, str]] = None):
         """Get result of text embedding with task_id
 
         Args:
@@ -120,6 +128,17 @@ class TextGeneration:
         Returns:
             A dictionary with detail response.
         """
-        url = f"{self.base_url}/ai/text_embedding/{task_id}"
-        response = requests.get(url, headers=headers)
-        return response.json()
\ No newline at end of file
+        url = self._urls.result_text_embedding.format(task_id)
+        response = self._get(url, headers=headers)
+        return self._json(response)
+
+    def wait_text_embedding(self, task_id: str, headers: Optional[Dict[str, str]] = None, **kwargs) -> Dict[str, Any]:
+        """Wait for a text embedding task to finish, see `wait_for_result` for the polling options.
+
+        Args:
+            task_id: The unique identifier of the text embedding task.
+
+        Returns:
+            A dictionary containing the result of the task.
+        """
+        return self.wait_for_result(task_id, lambda t: self.result_text_embedding(t, headers=headers), **kwargs)
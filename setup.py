@@ -12,4 +12,15 @@ classifiers=[
     'Operating System :: OS Independent',
 ],
 python_requires='>=3.7',
+install_requires=[
+    'requests',
+    # `Retry(allowed_methods=...)` in the default retry policy
+    'urllib3>=1.26',
+],
+extras_require={
+    'async': ['aiohttp'],
+    'http2': ['httpx[http2]'],
+    'orjson': ['orjson'],
+    'multipart': ['requests_toolbelt'],
+},
 )
\ No newline at end of file
@@ -0,0 +1,37 @@
+import pytest
+
+from flexstack.models.base import BaseClient
+
+
+class ChunkedResponse:
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def iter_bytes(self, chunk_size=None):
+        assert chunk_size is None, "a chunk size buffers the stream"
+        return iter(self.chunks)
+
+
+def test_iter_lines_joins_lines_split_across_chunks():
+    pytest.importorskip("httpx")
+    client = BaseClient("http://api.test", backend="httpx")
+    response = ChunkedResponse([b"data: he", b"ll", b"o\ndata: wor", b"ld\r", b"\n", b"\ndata: tail"])
+
+    lines = list(client._iter_lines(response))
+
+    assert lines == [b"data: hello", b"data: world", b"", b"data: tail"]
+
+
+def test_httpx_backend_uses_retries_for_connect_errors():
+    pytest.importorskip("httpx")
+    client = BaseClient("http://api.test", backend="httpx", retries=2)
+
+    assert client._session._transport._pool._retries == 2
+
+
+def test_httpx_backend_rejects_a_retry_policy():
+    pytest.importorskip("httpx")
+    from urllib3.util.retry import Retry
+
+    with pytest.raises(ValueError):
+        BaseClient("http://api.test", backend="httpx", retries=Retry(2))
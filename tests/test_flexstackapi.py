@@ -0,0 +1,33 @@
+from flexstack.flexstackapi import FlexStackAPI
+
+
+def test_assigning_empty_headers_removes_authorization():
+    api = FlexStackAPI("http://api.test", headers={"Authorization": "Bearer a", "X-Team": "core"})
+    assert api.headers["Authorization"] == "Bearer a"
+
+    api.headers = {}
+
+    assert "Authorization" not in api.headers
+    assert "X-Team" not in api.headers
+    assert "Authorization" not in api.info._session.headers
+
+
+def test_assigning_headers_keeps_session_defaults():
+    api = FlexStackAPI("http://api.test")
+    user_agent = api.headers["User-Agent"]
+
+    api.headers = {"Authorization": "Bearer a"}
+    api.headers = {"X-Team": "core"}
+
+    assert api.headers["User-Agent"] == user_agent
+    assert api.headers["X-Team"] == "core"
+    assert "Authorization" not in api.headers
+
+
+def test_headers_assigned_before_the_session_exists_are_applied():
+    api = FlexStackAPI("http://api.test", headers={"X-Team": "core"})
+    api.headers = {"Authorization": "Bearer a"}
+    assert api._http_session is None
+
+    assert api.image_tool._session.headers["Authorization"] == "Bearer a"
+    assert "X-Team" not in api.headers
@@ -0,0 +1,94 @@
+import json
+
+from flexstack.models.image import ImageGeneration
+
+
+class StubResponse:
+    status_code = 200
+
+    def __init__(self, body):
+        self.content = json.dumps(body).encode()
+
+
+class StubSession:
+    def __init__(self):
+        self.headers = {}
+        self.requests = []
+        self.status = "pending"
+
+    def post(self, url, **kwargs):
+        self.requests.append((url, kwargs))
+        return StubResponse({"data": {"task_id": f"t{len(self.requests)}"}})
+
+    def get(self, url, **kwargs):
+        return StubResponse({"data": {"status": self.status}})
+
+
+def test_create_txt2img_sends_width():
+    session = StubSession()
+    client = ImageGeneration("http://api.test", session=session)
+
+    client.create_txt2img("a cat", width=512, height=768)
+
+    url, kwargs = session.requests[-1]
+    configs = json.loads(kwargs["data"])["configs"]
+    assert url == "http://api.test/ai/image_generation"
+    assert configs["width"] == 512
+    assert configs["height"] == 768
+
+
+def test_fixed_seed_reuses_the_submitted_task():
+    session = StubSession()
+    client = ImageGeneration("http://api.test", session=session)
+
+    first = client.create_txt2img("a cat", seed=1)
+    second = client.create_txt2img("a cat", seed=1)
+
+    assert second == first
+    assert len(session.requests) == 1
+
+
+def test_random_seed_bypasses_the_cache():
+    session = StubSession()
+    client = ImageGeneration("http://api.test", session=session)
+
+    client.create_txt2img("a cat", seed=-1)
+    client.create_txt2img("a cat", seed=-1)
+
+    assert len(session.requests) == 2
+
+
+def test_cache_is_keyed_by_authorization():
+    session = StubSession()
+    client = ImageGeneration("http://api.test", session=session)
+
+    first = client.create_txt2img("a cat", seed=1)
+    session.headers["Authorization"] = "Bearer other"
+    second = client.create_txt2img("a cat", seed=1)
+    third = client.create_txt2img("a cat", seed=1, headers={"Authorization": "Bearer third"})
+
+    assert len({first["data"]["task_id"], second["data"]["task_id"], third["data"]["task_id"]}) == 3
+
+
+def test_failed_task_is_submitted_again():
+    session = StubSession()
+    client = ImageGeneration("http://api.test", session=session)
+
+    first = client.create_txt2img("a cat", seed=1)
+    session.status = "failed"
+    client.result_txt2img(first["data"]["task_id"])
+    second = client.create_txt2img("a cat", seed=1)
+
+    assert second["data"]["task_id"] != first["data"]["task_id"]
+
+
+def test_cached_task_is_not_shared_with_callers():
+    session = StubSession()
+    client = ImageGeneration("http://api.test", session=session)
+
+    first = client.create_txt2img("a cat", seed=1)
+    first["data"]["task_id"] = "changed"
+    second = client.create_txt2img("a cat", seed=1)
+    second["data"]["task_id"] = "changed again"
+
+    assert client.create_txt2img("a cat", seed=1)["data"]["task_id"] == "t1"
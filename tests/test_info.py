@@ -0,0 +1,56 @@
+import json
+
+from flexstack.models.info import FlexstackInfo
+
+
+class StubResponse:
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.content = json.dumps(body).encode()
+
+
+class StubSession:
+    def __init__(self):
+        self.headers = {}
+        self.requests = []
+        self.status_code = 200
+
+    def get(self, url, **kwargs):
+        self.requests.append((url, kwargs))
+        return StubResponse(self.status_code, {"data": ["sdxl-lightning"], "code": self.status_code})
+
+
+def test_headers_by_position_and_keyword_share_an_entry():
+    session = StubSession()
+    info = FlexstackInfo("http://api.test", session=session)
+    headers = {"Authorization": "Bearer a"}
+
+    first = info.get_models("image_generation", headers)
+    second = info.get_models("image_generation", headers=headers)
+    third = info.get_models(task="image_generation", headers=dict(headers))
+
+    assert first == second == third
+    assert len(session.requests) == 1
+
+
+def test_error_responses_are_not_cached():
+    session = StubSession()
+    info = FlexstackInfo("http://api.test", session=session)
+
+    session.status_code = 404
+    assert info.get_all_models()["code"] == 404
+    session.status_code = 200
+    assert info.get_all_models()["code"] == 200
+    assert info.get_all_models()["code"] == 200
+
+    assert len(session.requests) == 2
+
+
+def test_cached_result_is_not_shared_with_callers():
+    session = StubSession()
+    info = FlexstackInfo("http://api.test", session=session)
+
+    info.get_all_models()["data"].append("changed")
+    info.get_all_models()["data"].append("changed again")
+
+    assert info.get_all_models()["data"] == ["sdxl-lightning"]
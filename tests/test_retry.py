@@ -0,0 +1,81 @@
+import json
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from flexstack.models.base import DEFAULT_RETRY_OPTIONS, BaseClient, _retry_class
+
+
+@contextmanager
+def serve(statuses, retry_after=None):
+    """Serve the given status codes in turn, repeating the last one, and count the requests."""
+    hits = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            hits.append(self.command)
+            status = statuses[min(len(hits), len(statuses)) - 1]
+            body = json.dumps({"status": status}).encode()
+            self.send_response(status)
+            if retry_after is not None:
+                self.send_header("Retry-After", retry_after)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            self.do_GET()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield f"http://127.0.0.1:{server.server_port}", hits
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def client(base_url):
+    # The default policy without backoff, to keep the tests fast
+    retries = _retry_class()(**{**DEFAULT_RETRY_OPTIONS, "backoff_factor": 0})
+    return BaseClient(base_url, retries=retries)
+
+
+def test_post_is_sent_once_on_server_error():
+    with serve([500]) as (base_url, hits):
+        response = client(base_url)._post_json(base_url, {"prompt": "cat"})
+
+    assert hits == ["POST"]
+    assert response.status_code == 500
+    assert response.json() == {"status": 500}
+
+
+def test_post_is_retried_on_429_and_503_with_retry_after():
+    for status in (429, 503):
+        with serve([status, 200], retry_after="0") as (base_url, hits):
+            response = client(base_url)._post_json(base_url, {"prompt": "cat"})
+
+        assert hits == ["POST", "POST"]
+        assert response.status_code == 200
+
+
+def test_post_is_not_retried_on_429_without_retry_after():
+    with serve([429, 200]) as (base_url, hits):
+        response = client(base_url)._post_json(base_url, {"prompt": "cat"})
+
+    assert hits == ["POST"]
+    assert response.status_code == 429
+
+
+def test_get_is_retried_on_server_error():
+    with serve([500, 500, 200]) as (base_url, hits):
+        response = client(base_url)._get(base_url)
+
+    assert hits == ["GET", "GET", "GET"]
+    assert response.status_code == 200